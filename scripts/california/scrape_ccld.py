@@ -11,24 +11,33 @@ Data Source: https://www.ccld.dss.ca.gov/carefacilitysearch/
 """
 
 import argparse
-import json
 import time
-import random
 import os
-from datetime import datetime
-from dataclasses import dataclass, asdict
-from typing import List, Optional, Dict, Any
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Iterator, List, Optional
 import re
 
 try:
     import requests
-    from bs4 import BeautifulSoup
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+    from selectolax.lexbor import LexborHTMLParser
+    from requests_cache import CachedSession, DO_NOT_CACHE
+    import orjson
 except ImportError:
     print("Installing required packages...")
     import subprocess
-    subprocess.check_call(['pip', 'install', 'requests', 'beautifulsoup4', '--break-system-packages'])
+    subprocess.check_call(['pip', 'install', 'requests', 'selectolax', 'requests-cache', 'orjson', '--break-system-packages'])
     import requests
-    from bs4 import BeautifulSoup
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+    from selectolax.lexbor import LexborHTMLParser
+    from requests_cache import CachedSession, DO_NOT_CACHE
+    import orjson
 
 
 # California counties
@@ -51,8 +60,15 @@ FACILITY_TYPES = [
     ("FAMILY CHILD CARE HOME - SMALL", "840"),
 ]
 
+# Anti-forgery token hidden input on the search page
+TOKEN_RE = re.compile(r'name="__RequestVerificationToken"[^>]*value="([^"]+)"')
 
-@dataclass
+# License date patterns on the facility detail page
+FIRST_DATE_RE = re.compile(r'First Licensed:\s*(\d{1,2}/\d{1,2}/\d{4})')
+EXP_DATE_RE = re.compile(r'Expiration Date:\s*(\d{1,2}/\d{1,2}/\d{4})')
+
+
+@dataclass(slots=True)
 class Facility:
     """Represents a childcare facility."""
     license_number: str
@@ -72,53 +88,125 @@ class Facility:
     total_visits: Optional[int]
     total_citations: Optional[int]
     total_complaints: Optional[int]
-    scraped_at: str
+    scraped_at: str  # When the facility's county scrape started (shared per county)
     ccld_url: str
 
 
+class RateLimiter:
+    """Token bucket shared by all worker threads to cap the total request rate."""
+    
+    def __init__(self, rate: float, burst: int = 1):
+        """
+        Args:
+            rate: Requests per second allowed across all threads
+            burst: Maximum number of requests that may start back-to-back
+        """
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+    
+    def acquire(self):
+        """Block until a request slot is available."""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
 class CCLDScraper:
     """Scraper for California Community Care Licensing Division database."""
     
     BASE_URL = "https://www.ccld.dss.ca.gov/carefacilitysearch"
     SEARCH_URL = f"{BASE_URL}/Search/GetSearchResults"
     DETAIL_URL = f"{BASE_URL}/FacilityDetail"
+    CACHE_NAME = "ccld_cache"
+    CACHE_EXPIRE_AFTER = timedelta(days=7)
     
-    def __init__(self, delay_range=(1, 3)):
+    def __init__(self, max_rps=1.0, max_workers=8, use_cache=True):
         """
         Initialize scraper.
         
         Args:
-            delay_range: Tuple of (min, max) seconds to wait between requests
+            max_rps: Maximum requests per second across all workers
+            max_workers: Number of detail pages fetched concurrently
+            use_cache: Cache detail pages on disk so reruns skip unchanged facilities
         """
-        self.session = requests.Session()
+        if use_cache:
+            # Only detail pages are cached; the search token and POST searches
+            # must always hit the live site
+            self.session = CachedSession(
+                self.CACHE_NAME,
+                backend='sqlite',
+                expire_after=DO_NOT_CACHE,
+                urls_expire_after={f"{self.DETAIL_URL}/*": self.CACHE_EXPIRE_AFTER}
+            )
+        else:
+            self.session = requests.Session()
+        self.use_cache = use_cache
         self.session.headers.update({
             'User-Agent': 'CalChildWatch/1.0 (Civic Transparency Project; +https://github.com/calchildwatch)',
             'Accept': 'application/json, text/html, */*',
             'Accept-Language': 'en-US,en;q=0.9',
+            'Connection': 'keep-alive',
         })
-        self.delay_range = delay_range
+        
+        # Reuse TCP/TLS connections across the whole run and retry transient failures
+        adapter = HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=max(32, max_workers),
+            max_retries=Retry(
+                total=3,
+                backoff_factor=0.5,
+                status_forcelist=[429, 500, 502, 503, 504]
+            )
+        )
+        self.session.mount('https://', adapter)
+        self.rate_limiter = RateLimiter(max_rps)
+        self.max_workers = max_workers
         self.stats = {
             'requests': 0,
             'facilities_found': 0,
             'errors': 0
         }
+        self._stats_lock = threading.Lock()
     
     def _delay(self):
-        """Random delay between requests to be respectful."""
-        time.sleep(random.uniform(*self.delay_range))
+        """Wait for the shared rate limiter to be respectful."""
+        self.rate_limiter.acquire()
+    
+    def _is_cached(self, url: str) -> bool:
+        """Check whether a GET for this URL will be served from the disk cache
+        without contacting the site (an expired page still needs revalidating)."""
+        if not self.use_cache:
+            return False
+        cache = self.session.cache
+        response = cache.get_response(cache.create_key(requests.Request('GET', url)))
+        return response is not None and not response.is_expired
+    
+    def _count(self, key: str):
+        """Increment a stats counter (safe to call from worker threads)."""
+        with self._stats_lock:
+            self.stats[key] += 1
     
     def _get_search_token(self) -> Optional[str]:
         """Get the anti-forgery token from the search page."""
         try:
             response = self.session.get(self.BASE_URL)
-            self.stats['requests'] += 1
-            soup = BeautifulSoup(response.text, 'html.parser')
-            token_input = soup.find('input', {'name': '__RequestVerificationToken'})
-            if token_input:
-                return token_input.get('value')
+            self._count('requests')
+            token_match = TOKEN_RE.search(response.text)
+            if token_match:
+                return token_match.group(1)
         except Exception as e:
             print(f"Error getting search token: {e}")
-            self.stats['errors'] += 1
+            self._count('errors')
         return None
     
     def search_facilities(
@@ -164,11 +252,11 @@ class CCLDScraper:
                     data=payload,
                     headers={'X-Requested-With': 'XMLHttpRequest'}
                 )
-                self.stats['requests'] += 1
+                self._count('requests')
                 
                 if response.status_code != 200:
                     print(f"  Error: HTTP {response.status_code}")
-                    self.stats['errors'] += 1
+                    self._count('errors')
                     break
                 
                 # Parse response
@@ -195,7 +283,7 @@ class CCLDScraper:
                         'phone': item.get('FacilityPhone', ''),
                     }
                     facilities.append(facility)
-                    self.stats['facilities_found'] += 1
+                    self._count('facilities_found')
                 
                 # Check if more pages
                 total_records = data.get('TotalRecords', 0)
@@ -206,7 +294,7 @@ class CCLDScraper:
                 
             except Exception as e:
                 print(f"  Error on page {page}: {e}")
-                self.stats['errors'] += 1
+                self._count('errors')
                 break
         
         return facilities
@@ -221,17 +309,21 @@ class CCLDScraper:
         Returns:
             Dictionary with facility details or None
         """
-        self._delay()
+        url = f"{self.DETAIL_URL}/{license_number}"
+        
+        # Cached pages don't touch the site, so they skip the rate limiter
+        if not self._is_cached(url):
+            self._delay()
         
         try:
-            url = f"{self.DETAIL_URL}/{license_number}"
             response = self.session.get(url)
-            self.stats['requests'] += 1
+            self._count('requests')
             
             if response.status_code != 200:
                 return None
             
-            soup = BeautifulSoup(response.text, 'html.parser')
+            # Parse the raw bytes to skip a full-document decode to str
+            tree = LexborHTMLParser(response.content)
             
             details = {
                 'ccld_url': url,
@@ -247,50 +339,45 @@ class CCLDScraper:
             # The CCLD page has various sections with facility info
             
             # Look for license dates
-            license_info = soup.find('div', {'id': 'licenseInfo'})
-            if license_info:
+            license_info = tree.css_first('div#licenseInfo')
+            if license_info is not None:
                 # Extract dates using regex
-                text = license_info.get_text()
+                text = license_info.text(deep=True)
                 
-                first_date_match = re.search(r'First Licensed:\s*(\d{1,2}/\d{1,2}/\d{4})', text)
+                first_date_match = FIRST_DATE_RE.search(text)
                 if first_date_match:
                     details['license_first_date'] = first_date_match.group(1)
                 
-                exp_date_match = re.search(r'Expiration Date:\s*(\d{1,2}/\d{1,2}/\d{4})', text)
+                exp_date_match = EXP_DATE_RE.search(text)
                 if exp_date_match:
                     details['license_expiration_date'] = exp_date_match.group(1)
             
             # Look for inspection/visit info
-            visit_section = soup.find('div', {'id': 'visitHistory'})
-            if visit_section:
-                rows = visit_section.find_all('tr')
-                if rows:
-                    details['total_visits'] = len(rows) - 1  # Exclude header
-                    
-                    # Get most recent visit date
-                    if len(rows) > 1:
-                        first_row = rows[1]
-                        cells = first_row.find_all('td')
-                        if cells:
-                            details['last_inspection_date'] = cells[0].get_text(strip=True)
+            rows = tree.css('div#visitHistory tr')
+            if rows:
+                details['total_visits'] = len(rows) - 1  # Exclude header
+                
+                # Get most recent visit date
+                if len(rows) > 1:
+                    cell = rows[1].css_first('td')
+                    if cell is not None:
+                        details['last_inspection_date'] = cell.text(strip=True)
             
             # Count citations
-            citation_section = soup.find('div', {'id': 'citations'})
-            if citation_section:
-                citation_rows = citation_section.find_all('tr', class_='citation-row')
-                details['total_citations'] = len(citation_rows)
+            citation_section = tree.css_first('div#citations')
+            if citation_section is not None:
+                details['total_citations'] = len(citation_section.css('tr.citation-row'))
             
             # Count complaints
-            complaint_section = soup.find('div', {'id': 'complaints'})
-            if complaint_section:
-                complaint_rows = complaint_section.find_all('tr', class_='complaint-row')
-                details['total_complaints'] = len(complaint_rows)
+            complaint_section = tree.css_first('div#complaints')
+            if complaint_section is not None:
+                details['total_complaints'] = len(complaint_section.css('tr.complaint-row'))
             
             return details
             
         except Exception as e:
             print(f"  Error getting details for {license_number}: {e}")
-            self.stats['errors'] += 1
+            self._count('errors')
             return None
     
     def scrape_county(
@@ -308,22 +395,52 @@ class CCLDScraper:
         Returns:
             List of Facility objects
         """
+        return list(self.iter_county(county, include_details))
+    
+    def iter_county(
+        self,
+        county: str,
+        include_details: bool = False
+    ) -> Iterator[Facility]:
+        """
+        Scrape a county, yielding each Facility as soon as it is complete.
+        
+        Args:
+            county: County name
+            include_details: Whether to fetch detailed info for each facility
+            
+        Yields:
+            Facility objects in search result order
+        """
         print(f"\n{'='*60}")
         print(f"Scraping {county} County")
         print(f"{'='*60}")
         
-        all_facilities = []
+        # One timestamp for the whole county rather than one per facility
+        scraped_at = datetime.utcnow().isoformat()
+        
+        facility_list = []
         
         for type_name, type_code in FACILITY_TYPES:
             print(f"\n  Facility Type: {type_name}")
-            facilities = self.search_facilities(county, type_code, type_name)
+            facility_list.extend(self.search_facilities(county, type_code, type_name))
+        
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            # Optionally get detailed info; detail fetches are independent, so
+            # they run concurrently while the rate limiter bounds the total rate
+            if include_details and facility_list:
+                print(f"\n  Fetching details for {len(facility_list)} facilities "
+                      f"({self.max_workers} workers)...")
+                all_details = executor.map(
+                    self.get_facility_details,
+                    [f['license_number'] for f in facility_list]
+                )
+            else:
+                all_details = [None] * len(facility_list)
             
-            for facility_data in facilities:
-                # Optionally get detailed info
-                if include_details:
-                    details = self.get_facility_details(facility_data['license_number'])
-                    if details:
-                        facility_data.update(details)
+            for facility_data, details in zip(facility_list, all_details):
+                if details:
+                    facility_data.update(details)
                 else:
                     facility_data['ccld_url'] = f"{self.DETAIL_URL}/{facility_data['license_number']}"
                     facility_data['license_first_date'] = None
@@ -333,50 +450,45 @@ class CCLDScraper:
                     facility_data['total_citations'] = None
                     facility_data['total_complaints'] = None
                 
-                facility_data['scraped_at'] = datetime.utcnow().isoformat()
+                facility_data['scraped_at'] = scraped_at
                 
-                facility = Facility(**facility_data)
-                all_facilities.append(facility)
+                yield Facility(**facility_data)
         
-        print(f"\n  Total facilities in {county}: {len(all_facilities)}")
-        return all_facilities
+        print(f"\n  Total facilities in {county}: {len(facility_list)}")
     
     def scrape_all_counties(
         self,
         include_details: bool = False,
         output_dir: str = '../data'
-    ) -> Dict[str, List[Facility]]:
+    ) -> Dict[str, int]:
         """
         Scrape all California counties.
         
+        Facilities are streamed to each county file as they are scraped, so
+        only one county's search results are held in memory at a time.
+        
         Args:
             include_details: Whether to fetch detailed info
             output_dir: Directory to save county JSON files
             
         Returns:
-            Dictionary mapping county names to facility lists
+            Dictionary mapping county names to facility counts
         """
-        all_data = {}
+        counts = {}
         
         os.makedirs(output_dir, exist_ok=True)
         
         for county in CALIFORNIA_COUNTIES:
-            facilities = self.scrape_county(county, include_details)
-            all_data[county] = facilities
-            
-            # Save each county immediately
             county_filename = county.lower().replace(' ', '_')
             output_path = os.path.join(output_dir, f"{county_filename}_facilities.json")
             
-            with open(output_path, 'w') as f:
-                json.dump(
-                    [asdict(f) for f in facilities],
-                    f,
-                    indent=2
-                )
+            counts[county] = write_json_array(
+                output_path,
+                self.iter_county(county, include_details)
+            )
             print(f"  Saved to {output_path}")
         
-        return all_data
+        return counts
     
     def print_stats(self):
         """Print scraping statistics."""
@@ -388,6 +500,41 @@ class CCLDScraper:
         print(f"Total errors: {self.stats['errors']}")
 
 
+def write_json(path: str, data: Any):
+    """Write data as indented JSON using orjson (dataclasses are serialized natively)."""
+    with open(path, 'wb') as f:
+        f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+
+
+def write_json_array(path: str, items: Iterable[Any]) -> int:
+    """
+    Write items as an indented JSON array one element at a time.
+    
+    Produces the same bytes as write_json on a list without building the
+    whole list or its serialized form in memory. Items are streamed into a
+    temporary file that replaces path only once the array is complete, so
+    an interrupted scrape leaves the previous file in place.
+    
+    Returns:
+        Number of items written
+    """
+    tmp_path = f"{path}.tmp"
+    count = 0
+    try:
+        with open(tmp_path, 'wb') as f:
+            for item in items:
+                f.write(b'[\n  ' if count == 0 else b',\n  ')
+                f.write(orjson.dumps(item, option=orjson.OPT_INDENT_2).replace(b'\n', b'\n  '))
+                count += 1
+            f.write(b'\n]' if count else b'[]')
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return count
+
+
 def generate_summary(data_dir: str) -> Dict[str, Any]:
     """Generate a summary of all scraped data."""
     summary = {
@@ -400,35 +547,39 @@ def generate_summary(data_dir: str) -> Dict[str, Any]:
         }
     }
     
-    for filename in os.listdir(data_dir):
-        if not filename.endswith('_facilities.json'):
-            continue
-        
-        filepath = os.path.join(data_dir, filename)
-        with open(filepath, 'r') as f:
-            facilities = json.load(f)
+    total_by_type = Counter()
+    
+    with os.scandir(data_dir) as entries:
+        facility_files = [e for e in entries if e.name.endswith('_facilities.json')]
+    
+    for entry in facility_files:
+        with open(entry.path, 'rb') as f:
+            facilities = orjson.loads(f.read())
         
-        county_name = filename.replace('_facilities.json', '').replace('_', ' ').title()
+        county_name = entry.name.replace('_facilities.json', '').replace('_', ' ').title()
         
-        county_stats = {
-            'total_facilities': len(facilities),
-            'total_capacity': sum(f.get('capacity', 0) for f in facilities),
-            'by_type': {},
-            'by_status': {}
-        }
+        # Single pass over the facilities for capacity, type and status
+        total_capacity = 0
+        by_type = Counter()
+        by_status = Counter()
         
         for facility in facilities:
-            ftype = facility.get('facility_type', 'Unknown')
-            status = facility.get('status', 'Unknown')
-            
-            county_stats['by_type'][ftype] = county_stats['by_type'].get(ftype, 0) + 1
-            county_stats['by_status'][status] = county_stats['by_status'].get(status, 0) + 1
-            
-            summary['totals']['by_type'][ftype] = summary['totals']['by_type'].get(ftype, 0) + 1
+            total_capacity += facility.get('capacity', 0)
+            by_type[facility.get('facility_type', 'Unknown')] += 1
+            by_status[facility.get('status', 'Unknown')] += 1
+        
+        total_by_type += by_type
         
-        summary['counties'][county_name] = county_stats
-        summary['totals']['facilities'] += county_stats['total_facilities']
-        summary['totals']['capacity'] += county_stats['total_capacity']
+        summary['counties'][county_name] = {
+            'total_facilities': len(facilities),
+            'total_capacity': total_capacity,
+            'by_type': dict(by_type),
+            'by_status': dict(by_status)
+        }
+        summary['totals']['facilities'] += len(facilities)
+        summary['totals']['capacity'] += total_capacity
+    
+    summary['totals']['by_type'] = dict(total_by_type)
     
     return summary
 
@@ -459,16 +610,21 @@ def main():
         help='Fetch detailed info for each facility (slower)'
     )
     parser.add_argument(
-        '--delay-min',
+        '--max-rps',
         type=float,
         default=1.0,
-        help='Minimum delay between requests (seconds)'
+        help='Maximum requests per second across all workers'
     )
     parser.add_argument(
-        '--delay-max',
-        type=float,
-        default=3.0,
-        help='Maximum delay between requests (seconds)'
+        '--workers',
+        type=int,
+        default=8,
+        help='Number of concurrent detail page fetches (with --include-details)'
+    )
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='Bypass the on-disk cache of facility detail pages'
     )
     parser.add_argument(
         '--generate-summary',
@@ -483,15 +639,18 @@ def main():
         print("Generating summary from existing data...")
         summary = generate_summary(args.output)
         summary_path = os.path.join(args.output, 'summary.json')
-        with open(summary_path, 'w') as f:
-            json.dump(summary, f, indent=2)
+        write_json(summary_path, summary)
         print(f"Summary saved to {summary_path}")
         print(f"Total facilities: {summary['totals']['facilities']}")
         print(f"Total capacity: {summary['totals']['capacity']}")
         return
     
     # Initialize scraper
-    scraper = CCLDScraper(delay_range=(args.delay_min, args.delay_max))
+    scraper = CCLDScraper(
+        max_rps=args.max_rps,
+        max_workers=args.workers,
+        use_cache=not args.no_cache
+    )
     
     if args.all_counties:
         # Scrape all counties
@@ -503,8 +662,7 @@ def main():
         # Generate summary
         summary = generate_summary(args.output)
         summary_path = os.path.join(args.output, 'summary.json')
-        with open(summary_path, 'w') as f:
-            json.dump(summary, f, indent=2)
+        write_json(summary_path, summary)
         
     elif args.county:
         # Scrape single county
@@ -526,8 +684,7 @@ def main():
             county_filename = args.county.lower().replace(' ', '_')
             output_path = os.path.join(args.output, f"{county_filename}_facilities.json")
         
-        with open(output_path, 'w') as f:
-            json.dump([asdict(f) for f in facilities], f, indent=2)
+        write_json(output_path, facilities)
         
         print(f"\nSaved {len(facilities)} facilities to {output_path}")
     
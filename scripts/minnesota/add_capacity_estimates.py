@@ -11,11 +11,14 @@ Usage:
 """
 
 import argparse
-import json
 import os
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
 
+import orjson
+
 # Typical licensed capacity by facility type in Minnesota
 # Based on MN DHS licensing rules and averages
 CAPACITY_ESTIMATES = {
@@ -44,7 +47,20 @@ CAPACITY_ESTIMATES = {
     "default": 25,
 }
 
+# Fallback keyword rules for types without an exact match, checked in order
+# against the lower-cased type; every keyword in a rule must be present
+CAPACITY_KEYWORD_RULES = [
+    (("center",), "Child Care Center"),
+    (("family", "group"), "Group Family Child Care"),
+    (("family",), "Family Child Care"),
+    (("school",), "School Age Child Care"),
+    (("age",), "School Age Child Care"),
+    (("head start", "early"), "Early Head Start"),
+    (("head start",), "Head Start"),
+]
+
 
+@lru_cache(maxsize=128)
 def get_estimated_capacity(facility_type: str) -> int:
     """Get estimated capacity based on facility type."""
     if not facility_type:
@@ -57,18 +73,9 @@ def get_estimated_capacity(facility_type: str) -> int:
     # Check for partial matches (case-insensitive)
     facility_type_lower = facility_type.lower()
 
-    if "center" in facility_type_lower:
-        return CAPACITY_ESTIMATES["Child Care Center"]
-    elif "family" in facility_type_lower and "group" in facility_type_lower:
-        return CAPACITY_ESTIMATES["Group Family Child Care"]
-    elif "family" in facility_type_lower:
-        return CAPACITY_ESTIMATES["Family Child Care"]
-    elif "school" in facility_type_lower or "age" in facility_type_lower:
-        return CAPACITY_ESTIMATES["School Age Child Care"]
-    elif "head start" in facility_type_lower:
-        if "early" in facility_type_lower:
-            return CAPACITY_ESTIMATES["Early Head Start"]
-        return CAPACITY_ESTIMATES["Head Start"]
+    for keywords, estimate_key in CAPACITY_KEYWORD_RULES:
+        if all(keyword in facility_type_lower for keyword in keywords):
+            return CAPACITY_ESTIMATES[estimate_key]
 
     return CAPACITY_ESTIMATES["default"]
 
@@ -82,8 +89,8 @@ def process_county_file(filepath: Path, dry_run: bool = False) -> dict:
         "by_type": {}
     }
 
-    with open(filepath, 'r', encoding='utf-8') as f:
-        facilities = json.load(f)
+    with open(filepath, 'rb') as f:
+        facilities = orjson.loads(f.read())
 
     if not isinstance(facilities, list):
         print(f"  Skipping {filepath.name} - not a facility list")
@@ -111,9 +118,10 @@ def process_county_file(filepath: Path, dry_run: bool = False) -> dict:
         stats["updated"] += 1
         stats["by_type"][facility_type]["estimated_capacity"] = estimated
 
-    if not dry_run:
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(facilities, f, indent=2)
+    # Skip the rewrite when every facility already had a capacity
+    if not dry_run and stats["updated"]:
+        with open(filepath, 'wb') as f:
+            f.write(orjson.dumps(facilities, option=orjson.OPT_INDENT_2))
 
     return stats
 
@@ -138,10 +146,14 @@ def process_directory(data_dir: Path, dry_run: bool = False) -> dict:
     print(f"\nProcessing {len(facility_files)} county files in {data_dir}")
     print("=" * 60)
 
-    for filepath in facility_files:
-        county_name = filepath.stem.replace("_facilities", "").replace("_", " ").title()
+    # Each county file is independent, so process them across CPU cores
+    with ProcessPoolExecutor() as executor:
+        results = list(executor.map(
+            process_county_file, facility_files, [dry_run] * len(facility_files)
+        ))
 
-        stats = process_county_file(filepath, dry_run)
+    for filepath, stats in zip(facility_files, results):
+        county_name = filepath.stem.replace("_facilities", "").replace("_", " ").title()
 
         if stats["total"] > 0:
             print(f"  {county_name}: {stats['updated']}/{stats['total']} facilities updated")
@@ -170,16 +182,16 @@ def update_summary(data_dir: Path, dry_run: bool = False):
         print(f"No summary.json found in {data_dir}")
         return
 
-    with open(summary_path, 'r', encoding='utf-8') as f:
-        summary = json.load(f)
+    with open(summary_path, 'rb') as f:
+        summary = orjson.loads(f.read())
 
     # Add note about capacity estimation
     summary["capacity_note"] = "Capacity values are estimates based on facility type. Real capacity data pending from MN DHS."
     summary["capacity_estimated_at"] = datetime.now().isoformat()
 
     if not dry_run:
-        with open(summary_path, 'w', encoding='utf-8') as f:
-            json.dump(summary, f, indent=2)
+        with open(summary_path, 'wb') as f:
+            f.write(orjson.dumps(summary, option=orjson.OPT_INDENT_2))
         print(f"\nUpdated {summary_path}")
 
 
@@ -9,21 +9,31 @@ Usage:
 """
 
 import argparse
-import json
 import os
 import random
 import re
+import threading
 import time
-from datetime import datetime
-from typing import Dict, List, Optional
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
 from urllib.parse import urljoin, urlencode
 
+import orjson
 import requests
 from bs4 import BeautifulSoup
+from requests_cache import CachedSession, DO_NOT_CACHE
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 # Minnesota DHS License Lookup base URL
 BASE_URL = "https://licensinglookup.dhs.state.mn.us"
 
+# On-disk cache for facility detail pages
+CACHE_NAME = "mn_dhs_cache"
+CACHE_EXPIRE_AFTER = timedelta(days=7)
+
 # All 87 Minnesota counties
 MINNESOTA_COUNTIES = [
     "Aitkin", "Anoka", "Becker", "Beltrami", "Benton", "Big Stone", "Blue Earth",
@@ -41,6 +51,9 @@ MINNESOTA_COUNTIES = [
     "Wright", "Yellow Medicine"
 ]
 
+# Case-insensitive lookup from a --county argument to the canonical county name
+COUNTY_LOOKUP = {county.casefold(): county for county in MINNESOTA_COUNTIES}
+
 # Facility types to search
 FACILITY_TYPES = [
     ("Child Care Center", "CCC"),
@@ -48,22 +61,104 @@ FACILITY_TYPES = [
     # Add more as discovered
 ]
 
+# Labels on the facility detail page; the group name is the field it fills
+LABEL_RE = re.compile(
+    r"(?P<capacity>Capacity|Licensed For)"
+    r"|(?P<status>License Status|Status)"
+    r"|(?P<address>Address)"
+    r"|(?P<licensor>Licensor|Licensed By)"
+    r"|(?P<phone>Phone|Telephone)",
+    re.I
+)
+NUMBER_RE = re.compile(r"(\d+)")
+ZIP_RE = re.compile(r"(\d{5}(-\d{4})?)")
+
+
+class RateLimiter:
+    """Token bucket shared by all worker threads to cap the total request rate."""
+    
+    def __init__(self, rate: float, burst: int = 1):
+        """
+        Args:
+            rate: Requests per second allowed across all threads
+            burst: Maximum number of requests that may start back-to-back
+        """
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+    
+    def acquire(self):
+        """Block until a request slot is available."""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
 
 class MinnesotaDHSScraper:
     """Scraper for Minnesota DHS License Lookup system."""
     
-    def __init__(self, output_dir: str = "../data/minnesota"):
+    def __init__(self, output_dir: str = "../data/minnesota", max_workers: int = 4,
+                 use_cache: bool = True, max_rps: float = 0.5):
         self.output_dir = output_dir
-        self.session = requests.Session()
+        self.max_workers = max_workers
+        self.rate_limiter = RateLimiter(max_rps)
+        self.use_cache = use_cache
+        if use_cache:
+            # Detail pages are cached; searches must always hit the live site
+            # so new facilities show up on the next run. Expired pages are kept
+            # and revalidated with If-None-Match/If-Modified-Since, so an
+            # unchanged page costs a bodyless 304 instead of a full download.
+            self.session = CachedSession(
+                CACHE_NAME,
+                backend="sqlite",
+                expire_after=CACHE_EXPIRE_AFTER,
+                allowable_methods=["GET"],
+                urls_expire_after={f"{BASE_URL}/Search": DO_NOT_CACHE}
+            )
+        else:
+            self.session = requests.Session()
         self.session.headers.update({
             "User-Agent": "DaycareWatch Research Bot (transparency project)",
             "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
         })
+        
+        # Keep connections to the DHS host alive across the run (sized for the
+        # detail workers) and retry transient failures
+        adapter = HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=max(10, max_workers),
+            max_retries=Retry(
+                total=3,
+                backoff_factor=0.5,
+                status_forcelist=[429, 500, 502, 503, 504],
+                allowed_methods=["GET"]
+            )
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
         os.makedirs(output_dir, exist_ok=True)
     
     def _polite_delay(self):
-        """Respectful rate limiting."""
-        time.sleep(random.uniform(1.5, 3.0))
+        """Wait for the rate limiter shared by all detail workers."""
+        self.rate_limiter.acquire()
+    
+    def _is_cached(self, url: str) -> bool:
+        """Check whether a GET for this URL will be served from the disk cache
+        without contacting the site (an expired page still needs revalidating)."""
+        if not self.use_cache:
+            return False
+        cache = self.session.cache
+        response = cache.get_response(cache.create_key(requests.Request("GET", url)))
+        return response is not None and not response.is_expired
     
     def search_facilities(self, county: str, facility_type: str = None) -> List[Dict]:
         """
@@ -91,7 +186,7 @@ class MinnesotaDHSScraper:
             response = self.session.get(search_url, params=params, timeout=30)
             response.raise_for_status()
             
-            soup = BeautifulSoup(response.text, "html.parser")
+            soup = BeautifulSoup(response.content, "lxml")
             
             # Parse results - structure depends on actual site HTML
             # This is a placeholder that needs to be adapted
@@ -150,66 +245,86 @@ class MinnesotaDHSScraper:
             return facility
         
         try:
-            self._polite_delay()
+            # A cache hit never reaches the DHS site, so it needs no delay
+            if not self._is_cached(facility["detail_url"]):
+                self._polite_delay()
             response = self.session.get(facility["detail_url"], timeout=30)
             response.raise_for_status()
             
-            soup = BeautifulSoup(response.text, "html.parser")
+            soup = BeautifulSoup(response.content, "lxml")
             
             # Parse detail page - structure depends on actual site
-            # Look for common patterns
+            # Collect the first text node for each label in one document walk
+            labels = {}
+            for node in soup.find_all(string=LABEL_RE):
+                for match in LABEL_RE.finditer(node):
+                    labels.setdefault(match.lastgroup, node)
             
             # Capacity
-            capacity_elem = soup.find(string=re.compile(r"Capacity|Licensed For", re.I))
-            if capacity_elem:
-                capacity_text = capacity_elem.find_next().text if capacity_elem.find_next() else ""
-                capacity_match = re.search(r"(\d+)", capacity_text)
+            if "capacity" in labels:
+                capacity_match = NUMBER_RE.search(self._label_value(labels["capacity"]))
                 if capacity_match:
                     facility["capacity"] = int(capacity_match.group(1))
             
             # License status
-            status_elem = soup.find(string=re.compile(r"Status|License Status", re.I))
-            if status_elem:
-                facility["license_status"] = self._clean_text(
-                    status_elem.find_next().text if status_elem.find_next() else ""
-                )
+            if "status" in labels:
+                facility["license_status"] = self._clean_text(self._label_value(labels["status"]))
             
             # Address components
-            address_elem = soup.find(string=re.compile(r"Address", re.I))
-            if address_elem:
-                full_address = self._clean_text(
-                    address_elem.find_next().text if address_elem.find_next() else ""
-                )
+            if "address" in labels:
+                full_address = self._clean_text(self._label_value(labels["address"]))
                 facility["full_address"] = full_address
                 # Try to parse city, state, zip
-                zip_match = re.search(r"(\d{5}(-\d{4})?)", full_address)
+                zip_match = ZIP_RE.search(full_address)
                 if zip_match:
                     facility["zip_code"] = zip_match.group(1)
             
             # Licensor
-            licensor_elem = soup.find(string=re.compile(r"Licensor|Licensed By", re.I))
-            if licensor_elem:
-                facility["licensor"] = self._clean_text(
-                    licensor_elem.find_next().text if licensor_elem.find_next() else ""
-                )
+            if "licensor" in labels:
+                facility["licensor"] = self._clean_text(self._label_value(labels["licensor"]))
             
             # Phone
-            phone_elem = soup.find(string=re.compile(r"Phone|Telephone", re.I))
-            if phone_elem:
-                facility["phone"] = self._clean_text(
-                    phone_elem.find_next().text if phone_elem.find_next() else ""
-                )
+            if "phone" in labels:
+                facility["phone"] = self._clean_text(self._label_value(labels["phone"]))
             
         except Exception as e:
             print(f"Error fetching details for {facility.get('name', 'unknown')}: {e}")
         
         return facility
     
-    def _clean_text(self, text: str) -> str:
-        """Clean up extracted text."""
-        if not text:
+    def _label_value(self, label) -> str:
+        """Text of the element that follows a label's text node."""
+        value_elem = label.find_next()
+        return value_elem.text if value_elem else ""
+    
+    def _clean_text(self, text) -> str:
+        """Clean up extracted text, given a string or a parsed element."""
+        if text is None:
             return ""
-        return " ".join(text.strip().split())
+        if not isinstance(text, str):
+            # Read an element's text nodes directly instead of converting it
+            # to a string; the join below still collapses whitespace inside them
+            text = text.get_text(" ")
+        return " ".join(text.split())
+    
+    def _facility_key(self, facility: Dict) -> Any:
+        """Dedupe key for a search result: its license number, or for rows with a
+        blank license cell its detail link, then its name and address."""
+        return (
+            facility.get("license_number")
+            or facility.get("detail_url")
+            or (facility.get("name"), facility.get("address"))
+        )
+    
+    def _fetch_details(self, facilities: List[Dict]) -> List[Dict]:
+        """Fetch detail pages for facilities using a bounded pool of workers."""
+        results = []
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for i, facility in enumerate(executor.map(self.get_facility_details, facilities)):
+                results.append(facility)
+                if (i + 1) % 10 == 0:
+                    print(f"  Processed {i + 1}/{len(facilities)}")
+        return results
     
     def scrape_county(self, county: str, get_details: bool = True) -> List[Dict]:
         """Scrape all facilities in a county."""
@@ -217,35 +332,30 @@ class MinnesotaDHSScraper:
         print(f"Scraping {county} County, Minnesota")
         print(f"{'='*60}")
         
-        all_facilities = []
+        # Deduplicate across every search before any detail page is fetched;
+        # the first search to return a facility keeps it
+        by_id: Dict[Any, Dict] = {}
         
         # Search for each facility type
         for type_name, type_code in FACILITY_TYPES:
             print(f"\nSearching for {type_name}...")
             facilities = self.search_facilities(county, type_code)
-            
-            if get_details:
-                print(f"Found {len(facilities)} facilities, fetching details...")
-                for i, facility in enumerate(facilities):
-                    facility["county"] = county
-                    facilities[i] = self.get_facility_details(facility)
-                    if (i + 1) % 10 == 0:
-                        print(f"  Processed {i + 1}/{len(facilities)}")
-            
-            all_facilities.extend(facilities)
+            print(f"Found {len(facilities)} facilities")
+            for facility in facilities:
+                by_id.setdefault(self._facility_key(facility), facility)
         
         # Also search without type filter to catch any missed
         print("\nSearching all facility types...")
-        general_facilities = self.search_facilities(county)
+        for facility in self.search_facilities(county):
+            by_id.setdefault(self._facility_key(facility), facility)
+        
+        all_facilities = list(by_id.values())
+        for facility in all_facilities:
+            facility["county"] = county
         
-        # Deduplicate by license number
-        existing_ids = {f.get("license_number") for f in all_facilities}
-        for facility in general_facilities:
-            if facility.get("license_number") not in existing_ids:
-                facility["county"] = county
-                if get_details:
-                    facility = self.get_facility_details(facility)
-                all_facilities.append(facility)
+        if get_details:
+            print(f"\nFetching details for {len(all_facilities)} facilities...")
+            all_facilities = self._fetch_details(all_facilities)
         
         print(f"\nTotal facilities found in {county}: {len(all_facilities)}")
         return all_facilities
@@ -265,54 +375,54 @@ class MinnesotaDHSScraper:
             "facilities": facilities
         }
         
-        with open(filepath, "w") as f:
-            json.dump(output, f, indent=2)
+        write_json(filepath, output)
         
         print(f"Saved to {filepath}")
         return filepath
     
-    def generate_summary(self, county_data: Dict[str, List[Dict]]):
-        """Generate statewide summary JSON."""
+    def summarize_county(self, facilities: List[Dict]) -> Dict:
+        """Calculate one county's summary stats."""
+        total_capacity = sum(f.get("capacity", 0) or 0 for f in facilities)
+        
+        return {
+            "total_facilities": len(facilities),
+            "total_capacity": total_capacity,
+            "by_type": dict(Counter(f.get("facility_type", "Unknown") for f in facilities)),
+            "by_status": dict(Counter(f.get("license_status", "Unknown") for f in facilities))
+        }
+    
+    def generate_summary(self, county_stats: Dict[str, Dict]):
+        """Generate statewide summary JSON from per-county stats (see summarize_county)."""
         summary = {
             "state": "Minnesota",
             "generated_at": datetime.now().isoformat(),
             "source": "Minnesota DHS License Lookup",
-            "total_counties_scraped": len(county_data),
-            "total_facilities": sum(len(f) for f in county_data.values()),
-            "counties": {}
+            "total_counties_scraped": len(county_stats),
+            "total_facilities": sum(stats["total_facilities"] for stats in county_stats.values()),
+            "counties": county_stats
         }
         
-        for county, facilities in county_data.items():
-            # Calculate stats
-            total_capacity = sum(f.get("capacity", 0) or 0 for f in facilities)
-            
-            # Count by type
-            type_counts = {}
-            for f in facilities:
-                ftype = f.get("facility_type", "Unknown")
-                type_counts[ftype] = type_counts.get(ftype, 0) + 1
-            
-            # Count by status
-            status_counts = {}
-            for f in facilities:
-                status = f.get("license_status", "Unknown")
-                status_counts[status] = status_counts.get(status, 0) + 1
-            
-            summary["counties"][county] = {
-                "total_facilities": len(facilities),
-                "total_capacity": total_capacity,
-                "by_type": type_counts,
-                "by_status": status_counts
-            }
-        
         filepath = os.path.join(self.output_dir, "summary.json")
-        with open(filepath, "w") as f:
-            json.dump(summary, f, indent=2)
+        write_json(filepath, summary)
         
         print(f"\nSaved summary to {filepath}")
         return summary
 
 
+def write_json(filepath: str, data) -> None:
+    """Write data as indented JSON, replacing filepath only once the write is complete."""
+    tmp_path = f"{filepath}.tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+        # An interrupted run leaves the previous file in place, never a truncated one
+        os.replace(tmp_path, filepath)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="Scrape Minnesota DHS child care license data"
@@ -320,7 +430,7 @@ def main():
     parser.add_argument(
         "--county",
         type=str,
-        help="County to scrape (e.g., 'Hennepin')"
+        help="County to scrape, case-insensitive (e.g., 'Hennepin')"
     )
     parser.add_argument(
         "--all-counties",
@@ -338,6 +448,23 @@ def main():
         action="store_true",
         help="Skip fetching detailed facility info (faster but less data)"
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=4,
+        help="Number of facility detail pages fetched concurrently (default: 4)"
+    )
+    parser.add_argument(
+        "--max-rps",
+        type=float,
+        default=0.5,
+        help="Maximum detail page requests per second across all workers (default: 0.5)"
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Always re-download facility detail pages instead of using the 7-day disk cache"
+    )
     
     args = parser.parse_args()
     
@@ -346,28 +473,39 @@ def main():
         print(f"Available counties: {', '.join(MINNESOTA_COUNTIES[:10])}...")
         return
     
-    scraper = MinnesotaDHSScraper(output_dir=args.output)
-    county_data = {}
-    
-    counties_to_scrape = MINNESOTA_COUNTIES if args.all_counties else [args.county]
+    scraper = MinnesotaDHSScraper(
+        output_dir=args.output,
+        max_workers=args.workers,
+        use_cache=not args.no_cache,
+        max_rps=args.max_rps
+    )
+    # Only each county's summary stats are kept across the run; facility
+    # lists are written out per county rather than accumulated
+    county_stats = {}
     
-    # Validate county names
-    for county in counties_to_scrape:
-        if county not in MINNESOTA_COUNTIES:
-            print(f"Warning: '{county}' is not a valid Minnesota county")
+    if args.all_counties:
+        counties_to_scrape = MINNESOTA_COUNTIES
+    else:
+        # Validate the county name, accepting any capitalization
+        county = COUNTY_LOOKUP.get(args.county.strip().casefold())
+        if county is None:
+            print(f"Warning: '{args.county}' is not a valid Minnesota county")
             print(f"Valid counties: {', '.join(MINNESOTA_COUNTIES)}")
             return
+        counties_to_scrape = [county]
     
     print(f"\nDaycareWatch Minnesota Scraper")
     print(f"==============================")
     print(f"Counties to scrape: {len(counties_to_scrape)}")
     print(f"Output directory: {args.output}")
     print(f"Fetch details: {not args.no_details}")
+    print(f"Detail workers: {args.workers}")
+    print(f"Max requests/second: {args.max_rps}")
     
     for county in counties_to_scrape:
         try:
             facilities = scraper.scrape_county(county, get_details=not args.no_details)
-            county_data[county] = facilities
+            county_stats[county] = scraper.summarize_county(facilities)
             scraper.save_county_data(county, facilities)
             
             if args.all_counties and county != counties_to_scrape[-1]:
@@ -383,14 +521,14 @@ def main():
             continue
     
     # Generate summary
-    if county_data:
-        scraper.generate_summary(county_data)
+    if county_stats:
+        summary = scraper.generate_summary(county_stats)
         
         print(f"\n{'='*60}")
         print("SCRAPING COMPLETE")
         print(f"{'='*60}")
-        print(f"Counties scraped: {len(county_data)}")
-        print(f"Total facilities: {sum(len(f) for f in county_data.values())}")
+        print(f"Counties scraped: {summary['total_counties_scraped']}")
+        print(f"Total facilities: {summary['total_facilities']}")
         print(f"Output directory: {args.output}")
 
 
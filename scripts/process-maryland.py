@@ -5,9 +5,102 @@ Extracts Montgomery County facilities using table extraction
 """
 
 import pdfplumber
-import json
+import orjson
 import re
 import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+# CheckCCMD program type codes
+TYPE_MAP = {
+    'CTR': 'Child Care Center',
+    'FCCH': 'Family Child Care Home',
+    'LFCCH': 'Large Family Child Care Home',
+    'LOC': 'Letter of Compliance'
+}
+
+# CheckCCMD status values mapped to the shared status vocabulary
+STATUS_MAP = {
+    'Open': 'LICENSED',
+    'Closed': 'CLOSED',
+    'Suspended': 'SUSPENDED',
+    'Revoked': 'REVOKED'
+}
+
+# "City, MD XXXXX" within a provider address
+CITY_ZIP_RE = re.compile(r'([^,]+),\s*MD\s+(\d{5})')
+
+# The PDF opened once per worker process by _init_worker
+_worker_pdf = None
+
+
+def _init_worker(pdf_path):
+    """Open the PDF once in each worker process"""
+    global _worker_pdf
+    _worker_pdf = pdfplumber.open(pdf_path)
+
+
+def _extract_page_providers(page_num, target_county):
+    """Extract matching providers from a single page of the worker's PDF"""
+
+    providers = []
+    target_lower = target_county.lower() if target_county else ''
+
+    page = _worker_pdf.pages[page_num]
+
+    # Plain text extraction is much cheaper than table detection, so skip
+    # pages that never mention the target county. The page text runs line by
+    # line across columns, so a wrapped multi-word county ("Prince\nGeorge's")
+    # is split up; check each word on its own rather than the whole name.
+    if target_lower:
+        page_text = (page.extract_text() or '').lower()
+        if not all(word in page_text for word in target_lower.split()):
+            return providers
+
+    tables = page.extract_tables()
+
+    for table in tables:
+        for row in table:
+            if not row or len(row) < 7:
+                continue
+
+            # Skip header row
+            if row[0] == 'Provider Names' or not row[0]:
+                continue
+
+            # Check if this is our target county before cleaning anything else
+            if target_lower and target_lower not in (row[3] or '').replace('\n', ' ').lower():
+                continue
+
+            # Skip if missing essential data
+            prog_type = row[5] or ''
+            status = row[6] or ''
+            if not prog_type or not status:
+                continue
+
+            # Clean up newlines
+            name = row[0].replace('\n', ' ').strip()
+            if not name:
+                continue
+
+            address = (row[2] or '').replace('\n', ' ').strip()
+            school = row[4]
+
+            provider = {
+                'name': name,
+                'address': address,
+                'county': target_county,
+                'school': school.replace('\n', ' ').strip() if school else None,
+                'facility_type': prog_type.strip(),
+                'status': status.strip(),
+                'state': 'MD'
+            }
+
+            providers.append(provider)
+
+    return providers
+
 
 def extract_maryland_providers(pdf_path, target_county="Montgomery"):
     """Extract providers from Maryland CheckCCMD PDF using table extraction"""
@@ -15,54 +108,23 @@ def extract_maryland_providers(pdf_path, target_county="Montgomery"):
     providers = []
 
     with pdfplumber.open(pdf_path) as pdf:
-        print(f"Processing {len(pdf.pages)} pages...")
-
-        for page_num, page in enumerate(pdf.pages):
+        page_count = len(pdf.pages)
+
+    print(f"Processing {page_count} pages...")
+
+    # Table extraction is CPU-bound, so spread pages across processes; each
+    # worker opens the PDF once and results come back in page order
+    with ProcessPoolExecutor(initializer=_init_worker, initargs=(pdf_path,)) as executor:
+        page_results = executor.map(
+            _extract_page_providers,
+            range(page_count),
+            repeat(target_county),
+            chunksize=16
+        )
+        for page_num, page_providers in enumerate(page_results):
             if page_num % 100 == 0:
-                print(f"  Page {page_num + 1}/{len(pdf.pages)}...")
-
-            tables = page.extract_tables()
-
-            for table in tables:
-                for row in table:
-                    if not row or len(row) < 7:
-                        continue
-
-                    # Skip header row
-                    if row[0] == 'Provider Names' or not row[0]:
-                        continue
-
-                    name = row[0] or ''
-                    address = row[2] or ''
-                    county = row[3] or ''
-                    school = row[4] or ''
-                    prog_type = row[5] or ''
-                    status = row[6] or ''
-
-                    # Clean up newlines
-                    name = name.replace('\n', ' ').strip()
-                    address = address.replace('\n', ' ').strip()
-                    county = county.replace('\n', ' ').strip()
-
-                    # Check if this is our target county
-                    if target_county and target_county.lower() not in county.lower():
-                        continue
-
-                    # Skip if missing essential data
-                    if not name or not prog_type or not status:
-                        continue
-
-                    provider = {
-                        'name': name,
-                        'address': address,
-                        'county': target_county,
-                        'school': school.replace('\n', ' ').strip() if school else None,
-                        'facility_type': prog_type.strip(),
-                        'status': status.strip(),
-                        'state': 'MD'
-                    }
-
-                    providers.append(provider)
+                print(f"  Page {page_num + 1}/{page_count}...")
+            providers.extend(page_providers)
 
     return providers
 
@@ -79,23 +141,13 @@ def clean_and_dedupe(providers):
         if key not in seen:
             seen.add(key)
 
-            # Map facility type
-            type_map = {
-                'CTR': 'Child Care Center',
-                'FCCH': 'Family Child Care Home',
-                'LFCCH': 'Large Family Child Care Home',
-                'LOC': 'Letter of Compliance'
-            }
-            p['facility_type'] = type_map.get(p['facility_type'], p['facility_type'])
-
-            # Map status
-            status_map = {
-                'Open': 'LICENSED',
-                'Closed': 'CLOSED',
-                'Suspended': 'SUSPENDED',
-                'Revoked': 'REVOKED'
-            }
-            p['status'] = status_map.get(p['status'], p['status'])
+            # Map facility type and status
+            facility_type = p['facility_type']
+            if facility_type in TYPE_MAP:
+                p['facility_type'] = TYPE_MAP[facility_type]
+            status = p['status']
+            if status in STATUS_MAP:
+                p['status'] = STATUS_MAP[status]
 
             cleaned.append(p)
 
@@ -121,7 +173,10 @@ def main():
 
     print(f"After cleaning: {len(cleaned)} unique providers")
 
-    # Add placeholder fields for compatibility
+    by_type = Counter()
+    by_status = Counter()
+
+    # Add placeholder fields for compatibility, tallying the summary in the same pass
     for i, p in enumerate(cleaned):
         p['license_number'] = f"MD-MONT-{i+1:04d}"  # Generate placeholder license numbers
         p['capacity'] = None
@@ -133,32 +188,28 @@ def main():
 
         # Try to extract city and zip from address
         if p['address']:
-            # Pattern: City, MD XXXXX
-            match = re.search(r'([^,]+),\s*MD\s+(\d{5})', p['address'])
+            match = CITY_ZIP_RE.search(p['address'])
             if match:
                 p['city'] = match.group(1).strip()
                 p['zip_code'] = match.group(2)
 
+        by_type[p['facility_type']] += 1
+        by_status[p['status']] += 1
+
     # Save to JSON
     output_path = os.path.join(output_dir, 'montgomery_facilities.json')
-    with open(output_path, 'w') as f:
-        json.dump(cleaned, f, indent=2)
+    with open(output_path, 'wb') as f:
+        f.write(orjson.dumps(cleaned, option=orjson.OPT_INDENT_2))
 
     print(f"\nSaved to: {output_path}")
 
     # Print summary
-    by_type = {}
-    by_status = {}
-    for p in cleaned:
-        by_type[p['facility_type']] = by_type.get(p['facility_type'], 0) + 1
-        by_status[p['status']] = by_status.get(p['status'], 0) + 1
-
     print("\nBy facility type:")
-    for t, c in sorted(by_type.items(), key=lambda x: -x[1]):
+    for t, c in by_type.most_common():
         print(f"  {t}: {c}")
 
     print("\nBy status:")
-    for s, c in sorted(by_status.items(), key=lambda x: -x[1]):
+    for s, c in by_status.most_common():
         print(f"  {s}: {c}")
 
 